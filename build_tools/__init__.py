@@ -0,0 +1 @@
+# Build tooling package
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+In-process driver for format, lint and test.
+
+Runs black, flake8, mypy and pytest inside a single interpreter so
+`python build.py all` pays Python startup once instead of five times.
+"""
+
+import runpy
+import sys
+from typing import List, Tuple
+
+# (module, argv, ignore_exit_code) — mirrors the commands run_all() used
+# to spawn as separate interpreters
+CHECKS: List[Tuple[str, List[str], bool]] = [
+    ("black", ["."], False),
+    ("flake8", [
+        "function_app.py",
+        "--count", "--select=E9,F63,F7,F82",
+        "--show-source", "--statistics"
+    ], False),
+    ("flake8", [
+        "function_app.py",
+        "--count", "--exit-zero",
+        "--max-complexity=10",
+        "--max-line-length=127",
+        "--statistics"
+    ], True),
+    ("mypy", ["function_app.py", "--ignore-missing-imports"], False),
+    ("pytest", ["tests/", "-v"], False),
+]
+
+
+def run_tool(module: str, argv: List[str]) -> int:
+    """Run a tool's `python -m` entry point in-process, returning its exit code"""
+    saved_argv = sys.argv
+    sys.argv = [module] + argv
+    try:
+        runpy.run_module(module, run_name="__main__")
+    except SystemExit as exc:
+        if isinstance(exc.code, int):
+            return exc.code
+        return 0 if exc.code is None else 1
+    finally:
+        sys.argv = saved_argv
+    return 0
+
+
+def run_mypy(argv: List[str]) -> int:
+    """Run mypy through its API, which asks for a clean exit
+
+    mypy's command-line entry point hard-exits the interpreter
+    (os._exit) on completion, which would kill the remaining checks.
+    """
+    from mypy import api
+
+    stdout, stderr, exit_code = api.run(argv)
+    if stdout:
+        print(stdout, end="")
+    if stderr:
+        print(stderr, end="", file=sys.stderr)
+    return exit_code
+
+
+def main() -> int:
+    for module, argv, ignore_exit_code in CHECKS:
+        print(f"Running {module} {' '.join(argv)}")
+        if module == "mypy":
+            exit_code = run_mypy(argv)
+        else:
+            exit_code = run_tool(module, argv)
+        if exit_code != 0 and not ignore_exit_code:
+            return exit_code
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
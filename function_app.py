@@ -1,80 +1,118 @@
 import azure.functions as func
 import logging
-import json
-from datetime import datetime
+import msgspec
+from datetime import datetime, timezone
 
 app = func.FunctionApp()
 
+logger = logging.getLogger(__name__)
+
+
+class ChatRequest(msgspec.Struct):
+    """Typed schema for chat request bodies"""
+    message: str = ""
+    user_id: str = "anonymous"
+
+
+class ChatResponse(msgspec.Struct):
+    """Successful chat response"""
+    status: str
+    user_id: str
+    message_received: str
+    response: str
+    timestamp: datetime
+
+
+class ErrorResponse(msgspec.Struct):
+    """Error response for 4xx/5xx results"""
+    error: str
+    timestamp: datetime
+
+
+class HealthResponse(msgspec.Struct):
+    """Health check response"""
+    status: str
+    timestamp: datetime
+
+
+# Decoder/encoder built once: decoding straight into ChatRequest skips the
+# intermediate dict and validates field types for free
+_chat_decoder = msgspec.json.Decoder(ChatRequest)
+_encoder = msgspec.json.Encoder()
+
+
 @app.route(route="chat", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
 def chat_api(req: func.HttpRequest) -> func.HttpResponse:
     """
     Chat API endpoint that accepts POST requests with JSON payload.
     Logs all requests to console and returns a response.
     """
-    logging.info('Chat API endpoint triggered')
-    
-    # Log request details
-    logging.info(f'Request method: {req.method}')
-    logging.info(f'Request URL: {req.url}')
-    logging.info(f'Headers: {dict(req.headers)}')
-    
+    logger.info('Chat API endpoint triggered')
+
+    # Request details are DEBUG-only: materializing the headers dict and
+    # formatting these lines on every call is wasted work at INFO level
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('Request method: %s', req.method)
+        logger.debug('Request URL: %s', req.url)
+        logger.debug('Headers: %s', dict(req.headers))
+
+    # One timestamp per request; utcnow() is deprecated since 3.12
+    now = datetime.now(timezone.utc)
+
     try:
         # Parse request body
-        req_body = req.get_json()
-        logging.info(f'Request body: {json.dumps(req_body, indent=2)}')
-        
-        # Extract message from request
-        message = req_body.get('message', '')
-        user_id = req_body.get('user_id', 'anonymous')
-        
-        if not message:
-            logging.warning('Empty message received')
+        req_body = _chat_decoder.decode(req.get_body())
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Request body: %s', req_body)
+
+        if not req_body.message:
+            logger.warning('Empty message received')
             return func.HttpResponse(
-                json.dumps({
-                    "error": "Message field is required",
-                    "timestamp": datetime.utcnow().isoformat()
-                }),
+                _encoder.encode(ErrorResponse(
+                    error="Message field is required",
+                    timestamp=now
+                )),
                 status_code=400,
                 mimetype="application/json"
             )
-        
+
         # Log the conversation
-        logging.info(f'User: {user_id}, Message: {message}')
-        
-        # Create response
-        response_data = {
-            "status": "success",
-            "user_id": user_id,
-            "message_received": message,
-            "response": f"Echo: {message}",
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
-        logging.info(f'Response: {json.dumps(response_data, indent=2)}')
-        
+        logger.info('User: %s, Message: %s', req_body.user_id, req_body.message)
+
+        # Serialize once: the same compact body is logged and returned
+        body = _encoder.encode(ChatResponse(
+            status="success",
+            user_id=req_body.user_id,
+            message_received=req_body.message,
+            response=f"Echo: {req_body.message}",
+            timestamp=now
+        ))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Response: %s', body.decode())
+
         return func.HttpResponse(
-            json.dumps(response_data),
+            body,
             status_code=200,
             mimetype="application/json"
         )
-        
-    except ValueError as e:
-        logging.error(f'Invalid JSON in request: {str(e)}')
+
+    except msgspec.DecodeError as e:
+        logger.error('Invalid JSON in request: %s', e)
         return func.HttpResponse(
-            json.dumps({
-                "error": "Invalid JSON format",
-                "timestamp": datetime.utcnow().isoformat()
-            }),
+            _encoder.encode(ErrorResponse(
+                error="Invalid JSON format",
+                timestamp=now
+            )),
             status_code=400,
             mimetype="application/json"
         )
     except Exception as e:
-        logging.error(f'Error processing request: {str(e)}', exc_info=True)
+        logger.error('Error processing request: %s', e, exc_info=True)
         return func.HttpResponse(
-            json.dumps({
-                "error": "Internal server error",
-                "timestamp": datetime.utcnow().isoformat()
-            }),
+            _encoder.encode(ErrorResponse(
+                error="Internal server error",
+                timestamp=now
+            )),
             status_code=500,
             mimetype="application/json"
         )
@@ -85,13 +123,13 @@ def health_check(req: func.HttpRequest) -> func.HttpResponse:
     """
     Health check endpoint for monitoring and load balancers.
     """
-    logging.info('Health check endpoint triggered')
-    
+    logger.info('Health check endpoint triggered')
+
     return func.HttpResponse(
-        json.dumps({
-            "status": "healthy",
-            "timestamp": datetime.utcnow().isoformat()
-        }),
+        _encoder.encode(HealthResponse(
+            status="healthy",
+            timestamp=datetime.now(timezone.utc)
+        )),
         status_code=200,
         mimetype="application/json"
     )